@@ -1,196 +1,259 @@
+import math
 import streamlit as st
 import numpy as np
+import numexpr as ne
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
+from numba import njit
+from tsdownsample import MinMaxLTTBDownsampler
+
+# Serialize figures with orjson rather than the stdlib json encoder
+pio.json.config.default_engine = "orjson"
 
 st.set_page_config(layout="wide", page_title="Token Emissions Calculator")
 
 st.title("Token Emissions Calculator")
 
-# Sidebar for inputs
+# Sidebar for inputs, batched in a form so the app only reruns when the form is submitted
 with st.sidebar:
-    st.header("Model Parameters")
-    
-    initial_cap = st.number_input("Initial Hard Cap (tokens)", min_value=1.0, value=2.5e9, format="%.1e")
-    
-    # Hard cap growth parameters
-    st.subheader("Hard Cap Growth")
-    cap_growth_enabled = st.checkbox("Enable Hard Cap Growth", value=True)
-    cap_growth_rate = st.number_input("Cap Growth Rate", min_value=0.0, max_value=1.0, value=0.1, format="%.2f", 
-                                    help="Controls how quickly the cap grows (logarithmic growth)")
-    max_cap = st.number_input("Maximum Hard Cap", min_value=initial_cap, value=4e9, format="%.1e",
-                            help="The upper limit for the hard cap")
-    
-    start_tvl = st.number_input("Initial TVL", min_value=1.0, value=50e6, format="%.1e")
-    delta_max = st.number_input("Max Tokens Per Day", min_value=1.0, value=2e9, format="%.1e")
-    alpha = st.number_input("Alpha", min_value=1e-10, value=1e-5, format="%.1e")
-    rho = st.slider("Rho", min_value=0.01, max_value=2.0, value=1.0, step=0.01, format="%0.04f")
-    
-    st.header("Simulation Length")
-    years = st.slider("Years to Simulate", min_value=1, max_value=20, value=10)
-    
-    st.header("TVL Trajectory Parameters")
-    
-    # Linear growth parameters
-    st.subheader("Linear Growth")
-    growth_rate = st.slider("Growth Rate (Linear)", min_value=0.001, max_value=0.05, value=0.005, step=0.001, format="%.3f")
-    
-    # Sinusoidal parameters
-    st.subheader("Sinusoidal Growth")
-    sin_growth_rate = st.slider("Growth Rate (Sinusoidal)", min_value=0.001, max_value=0.05, value=0.005, step=0.001, format="%.3f")
-    amplitude = st.number_input("Amplitude", min_value=1.0, value=2e7, format="%.1e")
-    period = st.slider("Period (days)", min_value=30, max_value=730, value=365)
-    
-    # Exponential growth parameters
-    st.subheader("Exponential Growth")
-    exp_growth_rate = st.slider("Growth Rate (Exponential)", min_value=0.0001, max_value=0.002, value=0.0008, step=0.0001, format="%.4f")
-    
-    # S-curve parameters
-    st.subheader("S-Curve Growth")
-    s_curve_midpoint = st.slider("Midpoint (days)", min_value=100, max_value=3650, value=1825)
-    s_curve_steepness = st.slider("Steepness", min_value=0.001, max_value=0.05, value=0.005, step=0.001)
-    s_curve_max_tvl = st.number_input("Max TVL", min_value=start_tvl, value=1e9, format="%.1e")
+    with st.form("params"):
+        st.header("Model Parameters")
+        
+        initial_cap = st.number_input("Initial Hard Cap (tokens)", min_value=1.0, value=2.5e9, format="%.1e")
+        
+        # Hard cap growth parameters
+        st.subheader("Hard Cap Growth")
+        cap_growth_enabled = st.checkbox("Enable Hard Cap Growth", value=True)
+        cap_growth_rate = st.number_input("Cap Growth Rate", min_value=0.0, max_value=1.0, value=0.1, format="%.2f", 
+                                        help="Controls how quickly the cap grows (logarithmic growth)")
+        max_cap = st.number_input("Maximum Hard Cap", min_value=initial_cap, value=4e9, format="%.1e",
+                                help="The upper limit for the hard cap", key="max_cap")
+        
+        start_tvl = st.number_input("Initial TVL", min_value=1.0, value=50e6, format="%.1e")
+        delta_max = st.number_input("Max Tokens Per Day", min_value=1.0, value=2e9, format="%.1e")
+        alpha = st.number_input("Alpha", min_value=1e-10, value=1e-5, format="%.1e")
+        rho = st.slider("Rho", min_value=0.01, max_value=2.0, value=1.0, step=0.01, format="%0.04f")
+        
+        st.header("Simulation Length")
+        years = st.slider("Years to Simulate", min_value=1, max_value=20, value=10)
+        
+        st.header("TVL Trajectory Parameters")
+        
+        # Linear growth parameters
+        st.subheader("Linear Growth")
+        growth_rate = st.slider("Growth Rate (Linear)", min_value=0.001, max_value=0.05, value=0.005, step=0.001, format="%.3f")
+        
+        # Sinusoidal parameters
+        st.subheader("Sinusoidal Growth")
+        sin_growth_rate = st.slider("Growth Rate (Sinusoidal)", min_value=0.001, max_value=0.05, value=0.005, step=0.001, format="%.3f")
+        amplitude = st.number_input("Amplitude", min_value=1.0, value=2e7, format="%.1e")
+        period = st.slider("Period (days)", min_value=30, max_value=730, value=365)
+        
+        # Exponential growth parameters
+        st.subheader("Exponential Growth")
+        exp_growth_rate = st.slider("Growth Rate (Exponential)", min_value=0.0001, max_value=0.002, value=0.0008, step=0.0001, format="%.4f")
+        
+        # S-curve parameters
+        st.subheader("S-Curve Growth")
+        s_curve_midpoint = st.slider("Midpoint (days)", min_value=100, max_value=3650, value=1825)
+        s_curve_steepness = st.slider("Steepness", min_value=0.001, max_value=0.05, value=0.005, step=0.001)
+        # Stable keys keep edits to widgets whose min_value depends on another input in the form
+        s_curve_max_tvl = st.number_input("Max TVL", min_value=start_tvl, value=1e9, format="%.1e",
+                                          key="s_curve_max_tvl")
+        
+        st.form_submit_button("Update")
 
 # Create epochs (days)
 days = 365 * years
-epochs = np.linspace(0, days-1, days)  # One point per day
+epochs = np.arange(days, dtype=np.float64)  # One point per day
 
 # Hard cap growth function
-def calculate_hard_cap(t):
+@st.cache_data(max_entries=64)
+def calculate_hard_cap(t, initial_cap, max_cap, cap_growth_rate, cap_growth_enabled):
     if not cap_growth_enabled:
         return np.full_like(t, initial_cap)
     
+    # As the rate goes to zero the log curve below tends to linear growth to max_cap
+    # (and its log1p(0) denominator would divide by zero)
+    if cap_growth_rate == 0:
+        return initial_cap + (max_cap - initial_cap) * t / len(t)
+    
     # Logarithmic growth: base + (max-base) * log(1 + rate*t) / log(1 + rate*days)
     # This ensures we start at initial_cap and approach max_cap
-    cap_values = initial_cap + (max_cap - initial_cap) * np.log(1 + cap_growth_rate * t) / np.log(1 + cap_growth_rate * days)
+    log_denom = math.log1p(cap_growth_rate * len(t))
+    cap_values = initial_cap + (max_cap - initial_cap) / log_denom * np.log1p(cap_growth_rate * t)
     return cap_values
 
 # TVL trajectory functions
-def increasing_tvl(t, start=start_tvl, growth_rate=growth_rate):
+@st.cache_data(max_entries=64)
+def increasing_tvl(t, start, growth_rate):
     return start * (1 + growth_rate * t)
 
-def sinusoidal_increasing_tvl(t, start=start_tvl, growth_rate=sin_growth_rate, amplitude=amplitude, period=period):
-    trend = start * (1 + growth_rate * t)
-    seasonal = amplitude * np.sin(2 * np.pi * t / period)
-    return trend + seasonal
+@st.cache_data(max_entries=64)
+def sinusoidal_increasing_tvl(t, start, growth_rate, amplitude, period):
+    # Trend plus seasonal component, evaluated by numexpr in a single pass without temporaries
+    omega = 2 * np.pi / period
+    return ne.evaluate("start * (1 + growth_rate * t) + amplitude * sin(omega * t)")
 
-def exponential_tvl(t, start=start_tvl, growth_rate=exp_growth_rate):
+@st.cache_data(max_entries=64)
+def exponential_tvl(t, start, growth_rate):
     return start * np.exp(growth_rate * t)
 
-def s_curve_tvl(t, start=start_tvl, max_tvl=s_curve_max_tvl, midpoint=s_curve_midpoint, steepness=s_curve_steepness):
-    return start + (max_tvl - start) / (1 + np.exp(-steepness * (t - midpoint)))
+@st.cache_data(max_entries=64)
+def s_curve_tvl(t, start, max_tvl, midpoint, steepness):
+    return ne.evaluate("start + (max_tvl - start) / (1 + exp(-steepness * (t - midpoint)))")
 
-# Calculate emissions for a given TVL trajectory
-def calculate_emissions(tvl_trajectory):
-    tvl_values = tvl_trajectory(epochs)
-    cap_values = calculate_hard_cap(epochs)
-    minted_so_far = np.zeros_like(epochs)
-    emissions = np.zeros_like(epochs)
+# Step each trajectory (row) through epochs [start[i], days) with hard cap enforcement, filling the outputs in place.
+# The inverse TVL factor (scaled by delta_max) and 1/cap are precomputed, so the loop does no divisions
+@njit(cache=True, fastmath=True)
+def _emissions_kernel(delta_times_f, cap_values, inv_cap, minted_so_far, emissions, start):
+    days = delta_times_f.shape[1]
+    for i in range(delta_times_f.shape[0]):
+        for t in range(start[i], days):
+            current_cap = cap_values[t]
+            
+            # Once the cap is reached and has stopped growing every later emission is zero
+            if current_cap == cap_values[days - 1] and minted_so_far[i, t] >= current_cap * (1 - 1e-12):
+                emissions[i, t:] = 0.0
+                minted_so_far[i, t + 1:] = minted_so_far[i, t]
+                break
+            
+            # Cap remaining factor - use the current day's cap value
+            g_cap = 1 - minted_so_far[i, t] * inv_cap[t]
+            
+            # Provisional emission
+            e_t = delta_times_f[i, t] * g_cap
+            
+            # Hard cap enforcement - use the current day's cap
+            remaining = current_cap - minted_so_far[i, t]
+            e_actual = e_t if e_t < remaining else remaining  # lowers to a branchless minsd
+            emissions[i, t] = e_actual
+            
+            # Update minted so far for next epoch
+            if t < days - 1:
+                minted_so_far[i, t + 1] = minted_so_far[i, t] + e_actual
+
+# Calculate emissions for a batch of TVL trajectories, one trajectory per row
+@st.cache_data(max_entries=64)
+def calculate_emissions(tvl_batch, cap_values, alpha, rho, delta_max):
+    # Every entry is written below, so skip zero-filling the output
+    minted_so_far = np.empty_like(tvl_batch)
+    minted_so_far[:, 0] = 0.0
     
-    for t in range(len(epochs)):
-        # Cap remaining factor - use the current day's cap value
-        current_cap = cap_values[t]
-        g_cap = 1 - minted_so_far[t] / current_cap
-        
-        # Inverse TVL factor
-        f_tvl = 1 / (1 + alpha * tvl_values[t])**rho
-        
-        # Provisional emission
-        e_t = delta_max * g_cap * f_tvl
-        
-        # Hard cap enforcement - use the current day's cap
-        e_actual = min(e_t, current_cap - minted_so_far[t])
-        emissions[t] = e_actual
-        
-        # Update minted so far for next epoch
-        if t < len(epochs) - 1:
-            minted_so_far[t + 1] = minted_so_far[t] + e_actual
+    # Inverse TVL factor scaled by delta_max, and the inverse cap
+    delta_times_f = delta_max / (1 + alpha * tvl_batch)**rho
+    inv_cap = 1 / cap_values
+    
+    # Before the hard cap clamp kicks in, minted supply follows the linear recurrence
+    #   M[t+1] = (1 - k[t]) * M[t] + k[t] * C[t],   k[t] = delta_max * f(TVL[t]) / C[t]
+    # which is solved in closed form with cumulative products along each row
+    k = delta_times_f * inv_cap
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        cum_a = np.cumprod(1 - k, axis=1)
+        minted_so_far[:, 1:] = cum_a[:, :-1] * np.cumsum(delta_times_f / cum_a, axis=1)[:, :-1]
+        emissions = delta_times_f * (1 - minted_so_far * inv_cap)
+    
+    # The closed form holds until the clamp activates (k >= 1), the product underflows or
+    # minted supply reaches the cap (where rounding would otherwise push it past the cap);
+    # from there on each row falls back to stepping through the epochs one at a time
+    valid = (cum_a > 1e-200) & (minted_so_far < cap_values * (1 - 1e-12))
+    start = np.where(valid.all(axis=1), tvl_batch.shape[1], np.argmin(valid, axis=1))
+    
+    _emissions_kernel(delta_times_f, cap_values, inv_cap, minted_so_far, emissions, start)
     
-    return tvl_values, emissions, minted_so_far, cap_values
+    return emissions, minted_so_far
 
 # List of TVL trajectories with their labels
 trajectories = [
-    (increasing_tvl, "Linear Growth"),
-    (sinusoidal_increasing_tvl, "Sinusoidal Growth"),
-    (exponential_tvl, "Exponential Growth"),
-    (s_curve_tvl, "S-Curve Growth")
+    (increasing_tvl(epochs, start_tvl, growth_rate), "Linear Growth"),
+    (sinusoidal_increasing_tvl(epochs, start_tvl, sin_growth_rate, amplitude, period), "Sinusoidal Growth"),
+    (exponential_tvl(epochs, start_tvl, exp_growth_rate), "Exponential Growth"),
+    (s_curve_tvl(epochs, start_tvl, s_curve_max_tvl, s_curve_midpoint, s_curve_steepness), "S-Curve Growth")
 ]
 
-# Create plotly figure
-fig = make_subplots(rows=2, cols=2, 
-                   subplot_titles=("TVL Trajectory", "Daily Emissions", "Cumulative Distributed", "Hard Cap Over Time"),
-                   specs=[[{}, {}], [{}, {}]],
-                   shared_yaxes=False,
-                   horizontal_spacing=0.1,
-                   vertical_spacing=0.15)
+# Reduce a plotted series to at most max_points representative points with MinMaxLTTB,
+# so the figure payload stays bounded however many years are simulated
+def downsample(x, y, max_points=1000):
+    idx = MinMaxLTTBDownsampler().downsample(x, y, n_out=max_points)
+    return x[idx], y[idx]
 
 # Colors for different trajectories
 colors = ['blue', 'red', 'green', 'purple']
 
-# Get the hard cap values for plotting
-cap_values = calculate_hard_cap(epochs)
-
-# Plot hard cap evolution
-fig.add_trace(
-    go.Scatter(x=epochs/365, y=cap_values/1e9, name="Hard Cap", 
-               line=dict(color='black', width=2)),
-    row=2, col=2
-)
-
-# Calculate and plot each trajectory
-for idx, (tvl_func, label) in enumerate(trajectories):
-    tvl_values, emissions, minted_so_far, _ = calculate_emissions(tvl_func)
+# Create the plotly figure skeleton once: subplots, layout and one empty trace per series.
+# Traces are ordered hard cap, then TVL, daily emissions, cumulative for each trajectory
+@st.cache_resource
+def _make_figure_shell(n_traj):
+    fig = make_subplots(rows=2, cols=2, 
+                       subplot_titles=("TVL Trajectory", "Daily Emissions", "Cumulative Distributed", "Hard Cap Over Time"),
+                       specs=[[{}, {}], [{}, {}]],
+                       shared_yaxes=False,
+                       horizontal_spacing=0.1,
+                       vertical_spacing=0.15)
     
-    # Plot TVL trajectory
-    fig.add_trace(
-        go.Scatter(x=epochs/365, y=tvl_values/1e6, name="", 
-                   line=dict(color=colors[idx])),
-        row=1, col=1
-    )
+    # Hard cap evolution
+    fig.add_trace(go.Scattergl(name="Hard Cap", line=dict(color='black', width=2)), row=2, col=2)
     
-    # Plot daily emissions
-    fig.add_trace(
-        go.Scatter(x=epochs/365, y=emissions, name="", 
-                   line=dict(color=colors[idx])),
-        row=1, col=2
-    )
+    for idx in range(n_traj):
+        for row, col in ((1, 1), (1, 2), (2, 1)):
+            fig.add_trace(go.Scattergl(name="", line=dict(color=colors[idx])), row=row, col=col)
     
-    # Plot cumulative emissions
-    fig.add_trace(
-        go.Scatter(x=epochs/365, y=minted_so_far/1e9, name="", 
-                   line=dict(color=colors[idx])),
-        row=2, col=1
+    # Update layout
+    fig.update_layout(
+        height=800,
+        width=1100,
+        uirevision="static",
     )
+    
+    fig.update_xaxes(title_text="Years", row=1, col=1)
+    fig.update_xaxes(title_text="Years", row=1, col=2)
+    fig.update_xaxes(title_text="Years", row=2, col=1)
+    fig.update_xaxes(title_text="Years", row=2, col=2)
+    
+    fig.update_yaxes(title_text="TVL (millions)", row=1, col=1)
+    fig.update_yaxes(title_text="Tokens per Day", row=1, col=2)
+    fig.update_yaxes(title_text="Tokens (billions)", row=2, col=1)
+    fig.update_yaxes(title_text="Hard Cap (billions)", row=2, col=2)
+    return fig
+
+# Get the hard cap values, shared by the plot and the emissions calculation
+cap_values = calculate_hard_cap(epochs, initial_cap, max_cap, cap_growth_rate, cap_growth_enabled)
+
+# Calculate all trajectories in one batch
+tvl_batch = np.vstack([tvl_values for tvl_values, _ in trajectories])
+emissions_batch, minted_batch = calculate_emissions(tvl_batch, cap_values, alpha, rho, delta_max)
+
+# The cached shell is shared between sessions, so fill in a copy of it
+fig = go.Figure(_make_figure_shell(len(trajectories)))
+
+# Shared x axis in years for every series
+years_axis = epochs * (1.0 / 365.0)
+
+with fig.batch_update():
+    # Plot hard cap evolution
+    fig.data[0].x, fig.data[0].y = downsample(years_axis, cap_values * 1e-9)
+    
+    for idx, (tvl_values, label) in enumerate(trajectories):
+        emissions, minted_so_far = emissions_batch[idx], minted_batch[idx]
+        tvl_trace, emissions_trace, minted_trace = fig.data[1 + 3 * idx:4 + 3 * idx]
+        
+        # Plot TVL trajectory
+        tvl_trace.x, tvl_trace.y = downsample(years_axis, tvl_values * 1e-6)
+        
+        # Plot daily emissions
+        emissions_trace.x, emissions_trace.y = downsample(years_axis, emissions)
+        
+        # Plot cumulative emissions
+        minted_trace.x, minted_trace.y = downsample(years_axis, minted_so_far * 1e-9)
 
 # Add initial and max cap lines to cumulative plot
-fig.add_trace(
-    go.Scatter(x=[0, years], y=[initial_cap/1e9, initial_cap/1e9], name="Initial Cap", 
-               line=dict(color='black', width=1, dash='dash')),
-    row=2, col=1
-)
+fig.add_hline(y=initial_cap/1e9, line=dict(color='black', width=1, dash='dash'),
+              annotation_text="Initial Cap", row=2, col=1)
 
 if cap_growth_enabled:
-    fig.add_trace(
-        go.Scatter(x=[0, years], y=[max_cap/1e9, max_cap/1e9], name="Max Cap", 
-                   line=dict(color='gray', width=1, dash='dash')),
-        row=2, col=1
-    )
-
-# Update layout
-fig.update_layout(
-    height=800,
-    width=1100,
-)
-
-fig.update_xaxes(title_text="Years", row=1, col=1)
-fig.update_xaxes(title_text="Years", row=1, col=2)
-fig.update_xaxes(title_text="Years", row=2, col=1)
-fig.update_xaxes(title_text="Years", row=2, col=2)
-
-fig.update_yaxes(title_text="TVL (millions)", row=1, col=1)
-fig.update_yaxes(title_text="Tokens per Day", row=1, col=2)
-fig.update_yaxes(title_text="Tokens (billions)", row=2, col=1)
-fig.update_yaxes(title_text="Hard Cap (billions)", row=2, col=2)
+    fig.add_hline(y=max_cap/1e9, line=dict(color='gray', width=1, dash='dash'),
+                  annotation_text="Max Cap", row=2, col=1)
 
 st.plotly_chart(fig, use_container_width=True)
 
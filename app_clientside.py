@@ -0,0 +1,180 @@
+import json
+import streamlit as st
+import streamlit.components.v1 as components
+
+st.set_page_config(layout="wide", page_title="Token Emissions Calculator")
+
+st.title("Token Emissions Calculator")
+
+# Client-side version of app.py: the TVL trajectories and the emissions recurrence are
+# ported to JavaScript and the figure is redrawn with Plotly.react in the browser, so
+# moving a control never round-trips to the Streamlit server
+
+# Model controls: (id, label, input type, min, max, step, default)
+controls = [
+    ("cap", "Hard Cap (tokens)", "number", 1.0, None, "any", 2.5e9),
+    ("start_tvl", "Initial TVL", "number", 1.0, None, "any", 50e6),
+    ("delta_max", "Max Tokens Per Day", "number", 1.0, None, "any", 100e6),
+    ("alpha", "Alpha Parameter", "number", 1e-10, None, "any", 1e-5),
+    ("years", "Years to Simulate", "range", 1, 20, 1, 10),
+    ("growth_rate", "Growth Rate (Linear)", "range", 0.001, 0.05, 0.001, 0.01),
+    ("sin_growth_rate", "Growth Rate (Sinusoidal)", "range", 0.001, 0.05, 0.001, 0.005),
+    ("amplitude", "Amplitude", "number", 1.0, None, "any", 2e7),
+    ("period", "Period (days)", "range", 30, 730, 1, 365),
+    ("exp_growth_rate", "Growth Rate (Exponential)", "range", 0.0001, 0.01, 0.0001, 0.001),
+    ("s_curve_midpoint", "Midpoint (days)", "range", 100, 3650, 1, 1825),
+    ("s_curve_steepness", "Steepness", "range", 0.001, 0.05, 0.001, 0.005),
+    ("s_curve_max_tvl", "Max TVL", "number", 1.0, None, "any", 5e9),
+]
+
+# Colors for different trajectories
+colors = ['blue', 'red', 'green', 'purple']
+labels = ["Linear Growth", "Sinusoidal Growth", "Exponential Growth", "S-Curve Growth"]
+
+control_html = ""
+for cid, label, kind, lo, hi, step, default in controls:
+    max_attr = f' max="{hi}"' if hi is not None else ""
+    control_html += (f'<label>{label} <output id="{cid}_out">{default}</output>'
+                     f'<input id="{cid}" type="{kind}" min="{lo}"{max_attr} step="{step}" value="{default}"></label>\n')
+
+html = """
+<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>
+<style>
+body { font-family: sans-serif; margin: 0; }
+#app { display: flex; gap: 20px; }
+#controls { width: 260px; flex-shrink: 0; font-size: 13px; }
+#controls label { display: block; margin-bottom: 10px; }
+#controls input { display: block; width: 100%; }
+#controls output { float: right; color: #555; }
+#chart { flex-grow: 1; height: 500px; }
+</style>
+<div id="app">
+    <div id="controls">
+__CONTROLS__
+    </div>
+    <div id="chart"></div>
+</div>
+<script>
+const ids = __IDS__;
+const colors = __COLORS__;
+const labels = __LABELS__;
+
+// Read every control, or return null if any value is empty, partial or below its minimum
+function readParams() {
+    const p = {};
+    let valid = true;
+    for (const id of ids) {
+        const el = document.getElementById(id);
+        // Max TVL may not go below the initial TVL, like min_value=start_tvl in app.py
+        if (id === "s_curve_max_tvl" && Number.isFinite(p.start_tvl)) {
+            el.min = p.start_tvl;
+        }
+        const value = el.value.trim() === "" ? NaN : Number(el.value);
+        const ok = Number.isFinite(value) && value >= parseFloat(el.min);
+        document.getElementById(id + "_out").textContent = ok ? value.toPrecision(3) : "invalid";
+        p[id] = value;
+        valid = valid && ok;
+    }
+    return valid ? p : null;
+}
+
+// TVL trajectory functions
+const trajectories = [
+    (t, p) => p.start_tvl * (1 + p.growth_rate * t),
+    (t, p) => p.start_tvl * (1 + p.sin_growth_rate * t) + p.amplitude * Math.sin(2 * Math.PI * t / p.period),
+    (t, p) => p.start_tvl * Math.exp(p.exp_growth_rate * t),
+    (t, p) => p.start_tvl + (p.s_curve_max_tvl - p.start_tvl) / (1 + Math.exp(-p.s_curve_steepness * (t - p.s_curve_midpoint))),
+];
+
+// Calculate emissions for a given TVL trajectory, same recurrence as app.py
+function calculateEmissions(tvl, p) {
+    const days = tvl.length;
+    const emissions = new Array(days);
+    const minted = new Array(days);
+    let mintedSoFar = 0;
+    for (let t = 0; t < days; t++) {
+        minted[t] = mintedSoFar;
+        const eT = p.delta_max * (1 - mintedSoFar / p.cap) / (1 + p.alpha * tvl[t]);
+        const eActual = Math.min(eT, p.cap - mintedSoFar);
+        emissions[t] = eActual;
+        mintedSoFar += eActual;
+    }
+    return [emissions, minted];
+}
+
+function render() {
+    // Keep the last valid figure on screen while any input is invalid
+    const p = readParams();
+    if (p === null) {
+        return;
+    }
+    const days = 365 * p.years;
+    const years = Array.from({length: days}, (_, t) => t / 365);
+    const traces = [];
+    trajectories.forEach((tvlFunc, idx) => {
+        const tvl = Array.from({length: days}, (_, t) => tvlFunc(t, p));
+        const [emissions, minted] = calculateEmissions(tvl, p);
+        const line = {color: colors[idx]};
+        traces.push({type: "scattergl", x: years, y: tvl.map(v => v / 1e6), name: labels[idx], line: line, xaxis: "x", yaxis: "y"});
+        traces.push({type: "scattergl", x: years, y: emissions, name: labels[idx], line: line, xaxis: "x2", yaxis: "y2"});
+        traces.push({type: "scattergl", x: years, y: minted.map(v => v / 1e6), name: labels[idx], line: line, xaxis: "x3", yaxis: "y3"});
+    });
+    const title = (text, x) => ({text: text, x: x, y: 1.0, xref: "paper", yref: "paper", xanchor: "center", yanchor: "bottom", showarrow: false, font: {size: 16}});
+    const layout = {
+        uirevision: "static",
+        margin: {t: 40},
+        showlegend: false,
+        xaxis: {domain: [0, 0.3], title: {text: "Years"}},
+        xaxis2: {domain: [0.35, 0.65], title: {text: "Years"}},
+        xaxis3: {domain: [0.7, 1], title: {text: "Years"}},
+        yaxis: {anchor: "x", title: {text: "TVL (millions)"}},
+        yaxis2: {anchor: "x2", title: {text: "Tokens per Day"}},
+        yaxis3: {anchor: "x3", title: {text: "Tokens (millions)"}},
+        annotations: [title("TVL Trajectory", 0.15), title("Daily Emissions", 0.5), title("Cumulative Distributed", 0.85)],
+        // Cap line on cumulative plot
+        shapes: [{type: "line", xref: "x3 domain", x0: 0, x1: 1, yref: "y3", y0: p.cap / 1e6, y1: p.cap / 1e6,
+                  line: {color: "black", width: 2, dash: "dash"}}],
+    };
+    Plotly.react("chart", traces, layout, {responsive: true});
+}
+
+// Sliders redraw while dragging; number fields only once the edit is committed,
+// so partially typed values like "2.5e" never reach the model
+for (const id of ids) {
+    const el = document.getElementById(id);
+    el.addEventListener(el.type === "number" ? "change" : "input", render);
+}
+render();
+</script>
+"""
+
+html = (html
+        .replace("__CONTROLS__", control_html)
+        .replace("__IDS__", json.dumps([c[0] for c in controls]))
+        .replace("__COLORS__", json.dumps(colors))
+        .replace("__LABELS__", json.dumps(labels)))
+
+components.html(html, height=760, scrolling=True)
+
+# Add a legend below the charts
+st.markdown("""
+<style>
+.legend-item {
+    display: inline-block;
+    margin-right: 20px;
+}
+.color-box {
+    display: inline-block;
+    width: 15px;
+    height: 15px;
+    margin-right: 5px;
+    vertical-align: middle;
+}
+</style>
+<div>
+    <div class="legend-item"><span class="color-box" style="background-color:blue;"></span>Linear Growth</div>
+    <div class="legend-item"><span class="color-box" style="background-color:red;"></span>Sinusoidal Growth</div>
+    <div class="legend-item"><span class="color-box" style="background-color:green;"></span>Exponential Growth</div>
+    <div class="legend-item"><span class="color-box" style="background-color:purple;"></span>S-Curve Growth</div>
+</div>
+""", unsafe_allow_html=True)